@@ -0,0 +1,64 @@
+"""
+Startup/import-time benchmark for the CLI.
+
+    python benchmarks/bench_startup.py [--repeat 5]
+
+For each command, measures the median wall time of a fresh interpreter that
+imports the CLI plus the modules that command loads, and lists which heavy
+dependencies got imported. Light commands should stay free of them.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["langchain_core", "langchain_google_genai", "pandas", "pypdf"]
+
+# Modules each subcommand imports lazily (see src/cli.py)
+COMMAND_MODULES = {
+    "--help": [],
+    "stats": ["src.storage.database"],
+    "query": ["src.storage.database"],
+    "consolidate": ["src.pipeline.consolidator", "pandas"],
+    "ingest": ["src.ingestion.pdf_processor"],
+    "run": ["src.pipeline.orchestrator"],
+    "reprocess-quarantine": ["src.pipeline.orchestrator"],
+}
+
+PROBE = """
+import sys, json
+import src.cli
+for name in {modules!r}:
+    __import__(name)
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def measure(modules, repeat):
+    code = PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+    timings, loaded = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(time.perf_counter() - start)
+        loaded = json.loads(output.strip().splitlines()[-1])
+    return statistics.median(timings), loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'command':<22}{'median ms':>10}  heavy modules loaded")
+    for command, modules in COMMAND_MODULES.items():
+        seconds, loaded = measure(modules, args.repeat)
+        print(f"{command:<22}{seconds * 1000:>10.0f}  {', '.join(loaded) or '-'}")
+
+if __name__ == "__main__":
+    main()
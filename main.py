@@ -1,12 +1,6 @@
-from dotenv import load_dotenv
-from src.pipeline.orchestrator import DocumentPipeline
-
-# Load env before anything else
-load_dotenv()
-
-def main():
-    pipeline = DocumentPipeline()
-    pipeline.run()
+from src.cli import main
 
+# Subcommands (ingest, run, consolidate, reprocess-quarantine, stats, query)
+# import their heavy dependencies lazily; see src/cli.py.
 if __name__ == "__main__":
     main()
@@ -4,6 +4,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from src.config.settings import GOOGLE_API_KEY
 from src.config.prompts import CLASSIFICATION_SYSTEM_PROMPT
 from src.utils.logger import logger
+from src.utils.hedging import hedged_call
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 class ClassificationResult(BaseModel):
@@ -61,7 +62,7 @@ def classify_document(content_data: dict):
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def invoke_with_retry(msgs):
-        return chain.invoke(msgs)
+        return hedged_call("classification", chain.invoke, msgs)
 
     try:
         result = invoke_with_retry(messages)
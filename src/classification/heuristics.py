@@ -0,0 +1,47 @@
+import re
+from typing import Dict, Any, Optional
+
+# Filename hints (e.g. "NF_123.pdf", "contrato_acme.pdf")
+FILENAME_PATTERNS = {
+    "invoice": re.compile(r"(nota|nfe?[-_ ]|invoice|danfe)", re.IGNORECASE),
+    "contract": re.compile(r"(contrato|contract)", re.IGNORECASE),
+    "maintenance_report": re.compile(r"(relat[oó]rio|manuten[cç][aã]o|report)", re.IGNORECASE),
+}
+
+# Keywords commonly found in the body of each document type
+TEXT_KEYWORDS = {
+    "invoice": ["nota fiscal", "danfe", "cnpj", "valor total", "invoice"],
+    "contract": ["contrato", "contratante", "contratada", "vigência", "cláusula"],
+    "maintenance_report": ["manutenção", "técnico", "equipamento", "solução", "problema"],
+}
+
+# Only the beginning of the text is scanned, headers are what matter
+TEXT_SCAN_CHARS = 3000
+MIN_KEYWORD_HITS = 2
+
+def predict_document_type(filename: str, content_data: Dict[str, Any], use_filename: bool = True) -> Optional[str]:
+    """
+    Cheap local guess of the document type, used to start extraction
+    speculatively. Returns None when there is no clear signal.
+    With use_filename=False, only the text keywords count.
+    """
+    if use_filename:
+        for doc_type, pattern in FILENAME_PATTERNS.items():
+            if pattern.search(filename):
+                return doc_type
+
+    text = content_data.get("text", "")[:TEXT_SCAN_CHARS].lower()
+    if not text:
+        return None
+
+    scores = {
+        doc_type: sum(1 for keyword in keywords if keyword in text)
+        for doc_type, keywords in TEXT_KEYWORDS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_type, best_score = ranked[0]
+    runner_up_score = ranked[1][1]
+
+    if best_score >= MIN_KEYWORD_HITS and best_score > runner_up_score:
+        return best_type
+    return None
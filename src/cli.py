@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+from typing import List, Optional
+
+from src.config.settings import DATA_RAW_DIR, DATA_PROCESSED_DIR, DATA_QUARANTINE_DIR, DATA_HASHES_FILE
+
+# Heavy dependencies (LangChain, Gemini client, pandas, pypdf) are imported
+# inside the commands that need them, so `stats` or `--help` start instantly.
+
+def cmd_ingest(args):
+    """Reads the raw PDFs and reports what a `run` would process, without calling the LLM."""
+    from src.ingestion.pdf_processor import get_pdf_files, extract_content_from_pdf, compute_file_hash
+
+    processed_hashes = set()
+    if os.path.exists(DATA_HASHES_FILE):
+        with open(DATA_HASHES_FILE, "r") as f:
+            processed_hashes = set(json.load(f))
+
+    pending = 0
+    for file_path in sorted(get_pdf_files(args.directory)):
+        content = extract_content_from_pdf(file_path)
+        done = compute_file_hash(file_path) in processed_hashes
+        pending += not done
+        print(f"{os.path.basename(file_path)}\ttext_chars={len(content['text'])}\t"
+              f"images={len(content['images'])}\t{'processed' if done else 'pending'}")
+    print(f"{pending} document(s) pending in {args.directory}")
+
+def cmd_run(args):
+    from src.pipeline.orchestrator import DocumentPipeline
+
+    DocumentPipeline().run(args.directory)
+
+def cmd_consolidate(args):
+    from src.pipeline.consolidator import consolidate_to_csv
+
+    # Printed as well as logged: the console handler may be set above INFO
+    count = consolidate_to_csv(args.output)
+    if count:
+        print(f"Consolidated {count} records to {args.output}")
+    else:
+        print("No processed data found to consolidate.")
+
+def cmd_reprocess_quarantine(args):
+    """
+    Runs the pipeline over the quarantine folder. Documents that now get processed
+    are moved back to data/raw; the rest stay quarantined.
+    """
+    from src.pipeline.orchestrator import DocumentPipeline
+
+    if not os.path.isdir(DATA_QUARANTINE_DIR) or not os.listdir(DATA_QUARANTINE_DIR):
+        print("Quarantine is empty.")
+        return
+
+    DocumentPipeline(min_confidence=args.min_confidence).run(DATA_QUARANTINE_DIR)
+
+    released = 0
+    for filename in os.listdir(DATA_QUARANTINE_DIR):
+        base_name = os.path.splitext(filename)[0]
+        if os.path.exists(os.path.join(DATA_PROCESSED_DIR, f"{base_name}.json")):
+            shutil.move(os.path.join(DATA_QUARANTINE_DIR, filename), os.path.join(DATA_RAW_DIR, filename))
+            released += 1
+    print(f"Released {released} document(s) from quarantine.")
+
+def cmd_stats(args):
+    from src.storage.database import get_db
+
+    store = get_db()
+    if args.rebuild:
+        store.rebuild()
+
+    def count_files(directory, extension):
+        if not os.path.isdir(directory):
+            return 0
+        return sum(1 for name in os.listdir(directory) if name.endswith(extension))
+
+    stats = store.stats()
+    stats["files"] = {
+        "raw": count_files(DATA_RAW_DIR, ".pdf"),
+        "quarantine": count_files(DATA_QUARANTINE_DIR, ".pdf"),
+        "processed_json": count_files(DATA_PROCESSED_DIR, ".json"),
+    }
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+
+def cmd_query(args):
+    from src.storage.database import main as query_main
+
+    query_main(args.query_args, prog="main.py query")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Document processing pipeline.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    ingest = subparsers.add_parser("ingest", help="Read raw PDFs and list what is pending (no LLM calls)")
+    ingest.add_argument("--directory", default=DATA_RAW_DIR)
+    ingest.set_defaults(func=cmd_ingest)
+
+    run = subparsers.add_parser("run", help="Classify, extract and consolidate raw documents (default)")
+    run.add_argument("--directory", default=DATA_RAW_DIR)
+    run.set_defaults(func=cmd_run)
+
+    consolidate = subparsers.add_parser("consolidate", help="Write processed results to a CSV file")
+    consolidate.add_argument("--output", default="consolidated_results.csv")
+    consolidate.set_defaults(func=cmd_consolidate)
+
+    reprocess = subparsers.add_parser("reprocess-quarantine", help="Run the pipeline again over quarantined documents")
+    reprocess.add_argument("--min-confidence", type=float, default=0.80,
+                           help="Classification confidence needed to leave quarantine")
+    reprocess.set_defaults(func=cmd_reprocess_quarantine)
+
+    stats = subparsers.add_parser("stats", help="Counts of processed documents by type and status")
+    stats.add_argument("--rebuild", action="store_true", help="Re-index data/processed first")
+    stats.set_defaults(func=cmd_stats)
+
+    # Arguments (including --help) are forwarded to the query CLI in src/storage/database.py
+    query = subparsers.add_parser("query", help="Query the results index (see: main.py query --help)", add_help=False)
+    query.set_defaults(func=cmd_query)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # `python main.py` with no arguments keeps running the full pipeline
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv or ["run"])
+    if args.command == "query":
+        args.query_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if not hasattr(args, "func"):
+        parser.print_help()
+        return
+    args.func(args)
@@ -10,3 +10,10 @@ Return the classification and a confidence score.
 """
 
 EXTRACTION_SYSTEM_PROMPT = "Extract the following information from the document."
+
+REPAIR_SYSTEM_PROMPT = """Some fields extracted from this document failed validation.
+Re-extract ONLY the fields listed below, reading them carefully from the document excerpt.
+
+Failed fields:
+{issues}
+"""
@@ -9,3 +9,47 @@ DATA_RAW_DIR = os.path.join(os.getcwd(), "data", "raw")
 DATA_PROCESSED_DIR = os.path.join(os.getcwd(), "data", "processed")
 DATA_QUARANTINE_DIR = os.path.join(os.getcwd(), "data", "quarantine")
 DATA_HASHES_FILE = os.path.join(DATA_PROCESSED_DIR, "hashes.json")
+
+# Request hedging: if an LLM call runs longer than the observed latency
+# percentile, a duplicate request is fired and the first result wins.
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_LATENCY_PERCENTILE = float(os.getenv("HEDGE_LATENCY_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "2"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "15"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# Speculative extraction: start the predicted extractor alongside classification.
+SPECULATIVE_EXTRACTION_ENABLED = os.getenv("SPECULATIVE_EXTRACTION_ENABLED", "false").lower() == "true"
+
+# Budget shared by hedged and speculative requests (extra calls per minute),
+# so they cannot push the pipeline over the Gemini rate limit.
+EXTRA_REQUESTS_PER_MINUTE = int(os.getenv("EXTRA_REQUESTS_PER_MINUTE", "10"))
+
+# Validation-and-repair loop: failing fields are re-asked individually
+# instead of re-sending the whole document.
+REPAIR_ENABLED = os.getenv("REPAIR_ENABLED", "true").lower() == "true"
+REPAIR_MAX_ATTEMPTS = int(os.getenv("REPAIR_MAX_ATTEMPTS", "2"))
+REPAIR_CONTEXT_CHARS = int(os.getenv("REPAIR_CONTEXT_CHARS", "2000"))
+
+# SQLite index over processed results (built incrementally by save_result)
+DATA_INDEX_DB = os.getenv("DATA_INDEX_DB", os.path.join(DATA_PROCESSED_DIR, "index.sqlite3"))
+
+# Logging: records go through a queue to a background listener thread so
+# workers never block on handler I/O. LOG_SAMPLE_RATES keeps only a fraction
+# of per-document records per level, e.g. "INFO=0.1,DEBUG=0".
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_FILE_FORMAT = os.getenv("LOG_FILE_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Scheduling of documents onto worker slots: fifo, sjf (shortest job first),
+# priority (per-type weights) or fair (fair share between document types).
+# SCHEDULER_TYPE_PRIORITIES e.g. "invoice=2,contract=1" (higher = sooner / bigger share).
+SCHEDULER_POLICY = os.getenv("SCHEDULER_POLICY", "sjf")
+SCHEDULER_TYPE_PRIORITIES = os.getenv("SCHEDULER_TYPE_PRIORITIES", "")
+# Cost units a queued document gains per second waited; only affects documents
+# added while others are already queued (see DocumentScheduler)
+SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "0.1"))
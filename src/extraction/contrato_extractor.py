@@ -8,6 +8,8 @@ from src.models.contrato import ServiceContract
 from src.config.settings import GOOGLE_API_KEY
 from src.config.prompts import EXTRACTION_SYSTEM_PROMPT
 from src.utils.logger import logger
+from src.utils.hedging import hedged_call
+from src.validation.repair import salvage_partial_output
 
 class ContractExtractor(BaseExtractor):
     def extract(self, content_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,7 +24,7 @@ class ContractExtractor(BaseExtractor):
             google_api_key=GOOGLE_API_KEY
         )
         
-        structured_llm = llm.with_structured_output(ServiceContract)
+        structured_llm = llm.with_structured_output(ServiceContract, include_raw=True)
          
         user_content = []
         user_content.append({"type": "text", "text": EXTRACTION_SYSTEM_PROMPT})
@@ -43,12 +45,20 @@ class ContractExtractor(BaseExtractor):
         
         @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
         def invoke_with_retry(msgs):
-            return structured_llm.invoke(msgs)
+            response = hedged_call("extraction", structured_llm.invoke, msgs)
+            if response["parsing_error"] is None:
+                return response["parsed"].dict()
+            # Keep the fields that did come back; the repair loop re-asks only the invalid ones
+            partial = salvage_partial_output(response["raw"])
+            if not partial:
+                raise response["parsing_error"]
+            logger.warning(f"Contract output failed validation, keeping partial fields: {response['parsing_error']}")
+            return partial
 
         try:
             result = invoke_with_retry([message])
             logger.info("Contract extraction successful.")
-            return result.dict()
+            return result
         except Exception as e:
             logger.error(f"Contract extraction failed: {e}")
             raise e
@@ -5,6 +5,7 @@ import hashlib
 from typing import List, Dict, Any
 from pypdf import PdfReader
 from src.config.settings import DATA_RAW_DIR
+from src.utils.logger import logger
 
 def compute_file_hash(file_path: str) -> str:
     """Computes MD5 hash of a file efficiently to detect duplicates."""
@@ -24,12 +25,14 @@ def extract_content_from_pdf(file_path: str) -> Dict[str, Any]:
     """
     Extracts content from a PDF file.
     Prioritizes text. If text is empty/insufficient, tries to extract images.
-    Returns a dict with 'text' and 'images' (list of base64 strings).
+    Returns a dict with 'text' and 'images' (list of base64 strings), plus
+    'page_count' and 'image_bytes' used by the scheduler to estimate cost.
     """
     try:
         reader = PdfReader(file_path)
         full_text = ""
         images_b64 = []
+        image_bytes = 0
         
         for page in reader.pages:
             text = page.extract_text()
@@ -40,6 +43,7 @@ def extract_content_from_pdf(file_path: str) -> Dict[str, Any]:
             if len(text.strip()) < 50:
                  if page.images:
                     for img in page.images:
+                        image_bytes += len(img.data)
                         # Convert bytes to base64 for LLM consumption
                         img_b64 = base64.b64encode(img.data).decode('utf-8')
                         images_b64.append({
@@ -50,12 +54,14 @@ def extract_content_from_pdf(file_path: str) -> Dict[str, Any]:
         return {
             "text": full_text.strip(),
             "images": images_b64,
-            "has_images": len(images_b64) > 0
+            "has_images": len(images_b64) > 0,
+            "page_count": len(reader.pages),
+            "image_bytes": image_bytes
         }
 
     except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return {"text": "", "images": [], "has_images": False}
+        logger.error(f"Error reading {file_path}: {e}")
+        return {"text": "", "images": [], "has_images": False, "page_count": 0, "image_bytes": 0}
 
 def load_documents(directory: str = DATA_RAW_DIR) -> List[Dict[str, Any]]:
     """Loads all PDFs and returns a list of dictionaries with content and metadata."""
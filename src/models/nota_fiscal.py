@@ -1,5 +1,7 @@
 from typing import List
 from pydantic import BaseModel, Field, model_validator
+from src.validation.checks import math_divergence, MATH_TOLERANCE
+from src.utils.logger import logger
 
 class InvoiceItem(BaseModel):
     description: str = Field(description="Description of the item or service")
@@ -18,9 +20,8 @@ class Invoice(BaseModel):
     @model_validator(mode='after')
     def check_math(self):
         """Validates if the sum of items matches the total amount."""
-        calculated_total = sum(item.total_value for item in self.items)
-        # Tolerance of 0.01 for floating point rounding errors
-        if abs(calculated_total - self.total_amount) > 0.01:
-             print(f"[WARNING] Math divergence detected! Calculated: {calculated_total:.2f}, Note Total: {self.total_amount:.2f}")
-             # We could add a warning flag here if the model supported it
+        item_totals = [item.total_value for item in self.items]
+        if math_divergence(item_totals, self.total_amount) > MATH_TOLERANCE:
+             logger.warning(f"Math divergence detected! Calculated: {sum(item_totals):.2f}, Note Total: {self.total_amount:.2f}")
+             # Flagged here only; the repair loop (src/validation/repair.py) re-asks for the diverging fields
         return self
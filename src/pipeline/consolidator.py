@@ -1,8 +1,8 @@
 import os
 import json
-import pandas as pd
 from typing import List, Dict
 from src.config.settings import DATA_PROCESSED_DIR
+from src.utils.logger import logger
 
 def load_processed_data() -> List[Dict]:
     """Loads all JSON files from the processed directory."""
@@ -26,6 +26,11 @@ def load_processed_data() -> List[Dict]:
                         flat_entry["doc_type"] = flat_entry["classification"].get("type")
                         flat_entry["confidence"] = flat_entry["classification"].get("confidence")
                         del flat_entry["classification"]
+
+                    if "validation" in flat_entry:
+                        validation = flat_entry.pop("validation")
+                        flat_entry["validation_status"] = validation.get("status")
+                        flat_entry["repaired_fields"] = ",".join(validation.get("repaired_fields", []))
                     
                     # Add extraction data
                     extracted_data = content.get("data")
@@ -39,17 +44,20 @@ def load_processed_data() -> List[Dict]:
                     
                     data_list.append(flat_entry)
             except Exception as e:
-                print(f"Error reading {filename}: {e}")
+                logger.error(f"Error reading {filename}: {e}")
                 
     return data_list
 
-def consolidate_to_csv(output_path: str = "consolidated_results.csv"):
-    """Consolidates processed data into a single CSV file."""
+def consolidate_to_csv(output_path: str = "consolidated_results.csv") -> int:
+    """Consolidates processed data into a single CSV file. Returns the number of records written."""
+    # Imported here so commands that don't consolidate don't pay for pandas
+    import pandas as pd
+
     data = load_processed_data()
     
     if not data:
-        print("No processed data found to consolidate.")
-        return
+        logger.warning("No processed data found to consolidate.")
+        return 0
 
     df = pd.DataFrame(data)
     
@@ -64,4 +72,5 @@ def consolidate_to_csv(output_path: str = "consolidated_results.csv"):
     df = df[cols]
     
     df.to_csv(output_path, index=False, encoding="utf-8-sig") # utf-8-sig for Excel compatibility
-    print(f"[SUCCESS] Consolidated {len(df)} records to {output_path}")
+    logger.info(f"[SUCCESS] Consolidated {len(df)} records to {output_path}")
+    return len(df)
@@ -4,26 +4,59 @@ import time
 import concurrent.futures
 import shutil
 import threading
-from typing import Dict, Set
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Set, Optional, Tuple
 
-from src.config.settings import DATA_PROCESSED_DIR, DATA_QUARANTINE_DIR, DATA_HASHES_FILE
-from src.utils.logger import logger
+from src.config.settings import DATA_RAW_DIR, DATA_PROCESSED_DIR, DATA_QUARANTINE_DIR, DATA_HASHES_FILE, SPECULATIVE_EXTRACTION_ENABLED
+from src.utils.logger import logger, log_context, set_stage
+from src.utils.hedging import extra_request_budget
 from src.ingestion.pdf_processor import load_documents, compute_file_hash
 from src.classification.classifier import classify_document
+from src.classification.heuristics import predict_document_type
 from src.extraction.nota_fiscal_extractor import InvoiceExtractor
 from src.extraction.contrato_extractor import ContractExtractor
 from src.extraction.relatorio_extractor import ReportExtractor
 from src.pipeline.consolidator import consolidate_to_csv
+from src.pipeline.scheduler import DocumentScheduler
+from src.validation.repair import validate_and_repair
+from src.storage.database import get_db
+
+# Max workers = 5 to avoid Rate Limits on Gemini API
+MAX_WORKERS = 5
 
 class DocumentPipeline:
-    def __init__(self):
+    def __init__(self, speculative: bool = SPECULATIVE_EXTRACTION_ENABLED, min_confidence: float = 0.80):
         self.extractors = {
             "invoice": InvoiceExtractor(),
             "contract": ContractExtractor(),
             "maintenance_report": ReportExtractor()
         }
+        # Below this classification confidence, documents go to quarantine
+        self.min_confidence = min_confidence
         self.lock = threading.Lock()
         self.processed_hashes = self._load_hashes()
+        # Speculative extractions get their own pool (opened by run()) so they never take a document worker slot
+        self.speculative = speculative
+        self.speculative_executor = None
+        self.speculation_stats = {"started": 0, "hits": 0, "discarded": 0}
+
+    @contextmanager
+    def _speculation_pool(self):
+        """Opens the speculative executor for the duration of a run and shuts it down afterwards."""
+        if self.speculative:
+            self.speculative_executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            yield
+        finally:
+            if self.speculative_executor:
+                # Whatever is still running was discarded; don't wait for it
+                self.speculative_executor.shutdown(wait=False, cancel_futures=True)
+                self.speculative_executor = None
+
+    def _count_speculation(self, outcome: str):
+        with self.lock:
+            self.speculation_stats[outcome] += 1
 
     def _load_hashes(self) -> Set[str]:
         """Loads processed file hashes from disk."""
@@ -58,10 +91,47 @@ class DocumentPipeline:
             json.dump(result, f, indent=4, ensure_ascii=False)
         logger.info(f"[SAVED] {output_path}")
 
+        # Keep the query index in sync; the JSON file remains the source of truth
+        try:
+            get_db().index_result(filename, result)
+        except Exception as e:
+            logger.error(f"Failed to index {filename}: {e}")
+
+    def _start_speculative_extraction(self, filename: str, content_data: Dict) -> Optional[Tuple[str, concurrent.futures.Future]]:
+        """
+        Starts the extractor predicted by local heuristics in parallel with classification.
+        Returns (predicted_type, future) or None if there's no prediction or no budget left.
+        Only text keywords count: a filename match alone (or a scanned document) is too weak
+        a signal to spend a full multimodal extraction on.
+        """
+        if not self.speculative_executor:
+            return None
+
+        predicted_type = predict_document_type(filename, content_data, use_filename=False)
+        extractor = self.extractors.get(predicted_type)
+        if not extractor:
+            return None
+
+        if not extra_request_budget.try_acquire():
+            logger.info(f"Speculation budget exhausted, not pre-extracting {filename}")
+            return None
+
+        logger.info(f"Speculatively extracting {filename} as {predicted_type}")
+        self._count_speculation("started")
+        # Snapshot the context with the stage the speculative work actually belongs to
+        with log_context(doc_id=filename, stage="extraction"):
+            context = contextvars.copy_context()
+        return predicted_type, self.speculative_executor.submit(context.run, extractor.extract, content_data)
+
     def process_document(self, doc: Dict) -> str:
         """
         Processes a single document. Returns the document type processed (or 'error').
+        Every record logged while processing is tagged with the filename and stage.
         """
+        with log_context(doc_id=doc["metadata"]["filename"], stage="ingestion"):
+            return self._process_document(doc)
+
+    def _process_document(self, doc: Dict) -> str:
         filename = doc["metadata"]["filename"]
         source_path = doc["metadata"]["source"] # Getting source path
         content_data = doc["content"]
@@ -69,6 +139,7 @@ class DocumentPipeline:
         logger.info(f"Processing: {filename}")
         
         # 0. Duplicity Check (Hash-based)
+        set_stage("deduplication")
         try:
             file_hash = compute_file_hash(source_path)
             with self.lock:
@@ -102,8 +173,11 @@ class DocumentPipeline:
                 logger.error(f"Failed to move {filename} to quarantine: {e}")
                 return "error"
 
+        speculation = self._start_speculative_extraction(filename, content_data)
+
         try:
             # 1. Classification
+            set_stage("classification")
             classification = classify_document(content_data)
             
             if not classification:
@@ -114,7 +188,8 @@ class DocumentPipeline:
             confidence = classification.confidence
             
             # 1.5 Quarantine Check (Human-in-the-Loop)
-            if confidence < 0.80:
+            if confidence < self.min_confidence:
+                set_stage("quarantine")
                 logger.warning(f"Low confidence ({confidence:.2f}) for {filename}. Moving to quarantine.")
                 
                 os.makedirs(DATA_QUARANTINE_DIR, exist_ok=True)
@@ -150,14 +225,38 @@ class DocumentPipeline:
                 return "unknown"
 
             # 3. Extraction
+            set_stage("extraction")
             extractor = self.extractors.get(doc_type)
             if not extractor:
                 logger.error(f"No extractor found for type: {doc_type}")
                 return "error"
 
-            data = extractor.extract(content_data)
+            data = None
+            if speculation:
+                predicted_type, future = speculation
+                speculation = None
+                if predicted_type == doc_type:
+                    try:
+                        data = future.result()
+                        self._count_speculation("hits")
+                        logger.info(f"Speculative extraction hit for {filename}")
+                    except Exception as e:
+                        self._count_speculation("discarded")
+                        logger.warning(f"Speculative extraction failed for {filename}, extracting again: {e}")
+                else:
+                    future.cancel()
+                    self._count_speculation("discarded")
+                    logger.info(f"Discarding speculative {predicted_type} extraction for {filename} (classified as {doc_type})")
+
+            if data is None:
+                data = extractor.extract(content_data)
+
+            # 3.5 Validation (local checks, field-level re-ask for failures)
+            set_stage("validation")
+            data, validation = validate_and_repair(doc_type, data, content_data)
             
             # 4. Persistence
+            set_stage("persistence")
             output = {
                 "metadata": {
                     "filename": filename,
@@ -165,7 +264,8 @@ class DocumentPipeline:
                     "classification": {
                         "type": doc_type,
                         "confidence": confidence
-                    }
+                    },
+                    "validation": validation
                 },
                 "data": data
             }
@@ -181,20 +281,31 @@ class DocumentPipeline:
             logger.error(f"Failed to process {filename}: {e}", exc_info=True)
             return "error"
 
-    def run(self):
+        finally:
+            # Quarantine/unknown/error paths: drop the unused speculative result
+            if speculation:
+                speculation[1].cancel()
+                self._count_speculation("discarded")
+
+    def run(self, directory: str = DATA_RAW_DIR, scheduler: Optional[DocumentScheduler] = None):
         logger.info("--- Starting Document Processing Pipeline (Parallel) ---")
         
         # 1. Ingestion
         logger.info("Step 1: Ingesting documents...")
-        documents = load_documents()
+        documents = load_documents(directory)
         logger.info(f"Found {len(documents)} documents.")
 
         if not documents:
-            logger.warning("No documents found in data/raw.")
+            logger.warning(f"No documents found in {directory}.")
             return
 
         # 2. Parallel Processing Loop
-        logger.info("Step 2: Processing documents in parallel...")
+        if scheduler is None:
+            scheduler = DocumentScheduler()
+        # The whole batch is queued up front, so aging doesn't reorder it (see DocumentScheduler)
+        for doc in documents:
+            scheduler.add(doc)
+        logger.info(f"Step 2: Processing documents in parallel (scheduling: {scheduler.policy})...")
         
         stats = {
             "invoice": 0, 
@@ -207,29 +318,42 @@ class DocumentPipeline:
             "error": 0
         }
         
-        # Max workers = 5 to avoid Rate Limits on Gemini API
-        MAX_WORKERS = 5
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            # Start all tasks
-            future_to_file = {executor.submit(self.process_document, doc): doc["metadata"]["filename"] for doc in documents}
-            
-            for future in concurrent.futures.as_completed(future_to_file):
-                filename = future_to_file[future]
-                try:
-                    result_type = future.result()
-                    if result_type in stats:
-                        stats[result_type] += 1
-                    else:
+        started_at = time.monotonic()
+        time_to_result = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, self._speculation_pool():
+            # Only MAX_WORKERS tasks are in flight; the scheduler picks the next one as a slot frees up
+            future_to_file = {}
+            while scheduler or future_to_file:
+                while scheduler and len(future_to_file) < MAX_WORKERS:
+                    doc = scheduler.next()
+                    future_to_file[executor.submit(self.process_document, doc)] = doc["metadata"]["filename"]
+
+                done, _ = concurrent.futures.wait(future_to_file, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    filename = future_to_file.pop(future)
+                    time_to_result.append(time.monotonic() - started_at)
+                    try:
+                        result_type = future.result()
+                        if result_type in stats:
+                            stats[result_type] += 1
+                        else:
+                            stats["error"] += 1
+                    except Exception as e:
+                        logger.error(f"Generated an exception for {filename}: {e}")
                         stats["error"] += 1
-                except Exception as e:
-                    logger.error(f"Generated an exception for {filename}: {e}")
-                    stats["error"] += 1
 
         logger.info("--- Processing Complete ---")
         logger.info("Summary:")
         for k, v in stats.items():
             logger.info(f"  {k}: {v}")
+
+        time_to_result.sort()
+        p95 = time_to_result[min(int(0.95 * len(time_to_result)), len(time_to_result) - 1)]
+        if self.speculation_stats["started"]:
+            spec = self.speculation_stats
+            logger.info(f"  speculation: {spec['hits']}/{spec['started']} hits ({spec['hits'] / spec['started']:.0%}), {spec['discarded']} discarded")
+        logger.info(f"  time-to-result: mean {sum(time_to_result) / len(time_to_result):.1f}s, p95 {p95:.1f}s, total {time.monotonic() - started_at:.1f}s")
         
         logger.info("Step 3: Consolidating results...")
         consolidate_to_csv()
@@ -1,3 +1,263 @@
-# Placeholder for database connection and operations
-def get_db():
-    pass
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.settings import DATA_INDEX_DB, DATA_PROCESSED_DIR
+from src.storage.schemas import DOCUMENTS_TABLE, INDEXES, FTS_TABLE
+from src.validation.checks import parse_date, normalize_cnpj
+from src.utils.logger import logger
+
+# Filter name -> indexed column
+FILTER_COLUMNS = {
+    "doc_type": "doc_type",
+    "status": "status",
+    "supplier": "supplier_name",
+    "cnpj": "cnpj",
+    "equipment": "equipment_name",
+    "technician": "technician_name",
+}
+
+def month_range(month: str) -> Tuple[str, str]:
+    """'2024-03' -> ('2024-03-01', '2024-04-01'), a half-open ISO date range."""
+    year, mon = (int(part) for part in month.split("-"))
+    start = date(year, mon, 1)
+    end = date(year + mon // 12, mon % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+def parse_month(value: str) -> Tuple[str, str]:
+    """argparse type for --month: validates YYYY-MM and returns its date range."""
+    try:
+        return month_range(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month {value!r}, expected YYYY-MM")
+
+def _row_from_result(filename: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a saved result (metadata + data) to the indexed columns and FTS body."""
+    metadata = result.get("metadata", {})
+    classification = metadata.get("classification", {})
+    data = result.get("data") or {}
+
+    parsed_date = parse_date(data.get("date"))
+    descriptions = [
+        data.get("supplier_name"), data.get("contractor_name"), data.get("hired_name"),
+        data.get("object_description"), data.get("equipment_name"),
+        data.get("problem_description"), data.get("solution_description"),
+    ]
+    descriptions += [item.get("description") for item in data.get("items") or [] if isinstance(item, dict)]
+
+    return {
+        "filename": filename,
+        "doc_type": classification.get("type"),
+        "status": metadata.get("status", "processed"),
+        "confidence": classification.get("confidence"),
+        "processed_at": metadata.get("processed_at"),
+        "supplier_name": data.get("supplier_name") or data.get("hired_name"),
+        "cnpj": normalize_cnpj(data.get("cnpj")),
+        "doc_date": parsed_date.isoformat() if parsed_date else None,
+        "equipment_name": data.get("equipment_name"),
+        "technician_name": data.get("technician_name"),
+        "payload": json.dumps(result, ensure_ascii=False),
+        "body": "\n".join(str(d) for d in descriptions if d),
+    }
+
+class DocumentStore:
+    """
+    Local SQLite index over processed results, with secondary indexes on
+    supplier/CNPJ/date/equipment/technician and full-text search over descriptions.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, db_path: str = DATA_INDEX_DB):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(DOCUMENTS_TABLE)
+        for statement in INDEXES:
+            self.conn.execute(statement)
+        try:
+            self.conn.execute(FTS_TABLE)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite FTS5 not available, falling back to LIKE search.")
+            self.fts_enabled = False
+        self.conn.commit()
+
+    def index_result(self, filename: str, result: Dict[str, Any]):
+        """Inserts or replaces the index entry for a saved result."""
+        row = _row_from_result(filename, result)
+        body = row.pop("body")
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{c}" for c in row)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in row if c != "filename")
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT INTO documents ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(filename) DO UPDATE SET {updates}",
+                row
+            )
+            if self.fts_enabled:
+                rowid = self.conn.execute("SELECT rowid FROM documents WHERE filename = ?", (filename,)).fetchone()[0]
+                self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+                self.conn.execute("INSERT INTO documents_fts (rowid, body) VALUES (?, ?)", (rowid, body))
+
+    def find(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+             limit: int = 100, **filters) -> List[Dict[str, Any]]:
+        """
+        Looks up documents by indexed fields, e.g. find(cnpj="11.222.333/0001-81", date_from="2024-03-01", date_to="2024-04-01").
+        Filters: doc_type, status, supplier, cnpj, equipment, technician. date_to is exclusive.
+        """
+        clauses, params = self._filter_clauses(filters, date_from, date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM documents d {where} ORDER BY d.doc_date DESC LIMIT ?"
+        return self._fetch(sql, params + [limit])
+
+    def search(self, text: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               limit: int = 50, **filters) -> List[Dict[str, Any]]:
+        """
+        Full-text search over descriptions, optionally narrowed by the same filters as find().
+        A blank query matches nothing.
+        """
+        if not text.split():
+            return []
+        clauses, params = self._filter_clauses(filters, date_from, date_to)
+        if self.fts_enabled:
+            # Quote each term so user input can't inject FTS syntax
+            match = " ".join('"{}"'.format(term.replace('"', '""')) for term in text.split())
+            clauses.insert(0, "documents_fts MATCH ?")
+            params.insert(0, match)
+            sql = (f"SELECT d.* FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid "
+                   f"WHERE {' AND '.join(clauses)} ORDER BY documents_fts.rank LIMIT ?")
+        else:
+            clauses.insert(0, "payload LIKE ?")
+            params.insert(0, f"%{text}%")
+            sql = f"SELECT * FROM documents d WHERE {' AND '.join(clauses)} LIMIT ?"
+        return self._fetch(sql, params + [limit])
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Document counts grouped by type and by status."""
+        with self.lock:
+            by_type = self.conn.execute("SELECT doc_type, COUNT(*) FROM documents GROUP BY doc_type").fetchall()
+            by_status = self.conn.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall()
+        return {
+            "by_type": {row[0] or "none": row[1] for row in by_type},
+            "by_status": {row[0] or "none": row[1] for row in by_status},
+        }
+
+    def rebuild(self, directory: str = DATA_PROCESSED_DIR) -> int:
+        """Indexes every processed JSON file in `directory`. Returns the number indexed."""
+        indexed = 0
+        for filename in sorted(os.listdir(directory)) if os.path.exists(directory) else []:
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                    result = json.load(f)
+                if isinstance(result, dict) and "metadata" in result:
+                    self.index_result(result["metadata"].get("filename", filename), result)
+                    indexed += 1
+            except Exception as e:
+                logger.error(f"Failed to index {filename}: {e}")
+        return indexed
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _filter_clauses(self, filters: Dict[str, Any], date_from: Optional[str], date_to: Optional[str]):
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter: {name}")
+            if name == "cnpj":
+                value = normalize_cnpj(value)
+            clauses.append(f"d.{FILTER_COLUMNS[name]} = ?")
+            params.append(value)
+        if date_from:
+            clauses.append("d.doc_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("d.doc_date < ?")
+            params.append(date_to)
+        return clauses, params
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            entry = dict(row)
+            entry["result"] = json.loads(entry.pop("payload"))
+            results.append(entry)
+        return results
+
+_store: Optional[DocumentStore] = None
+_store_lock = threading.Lock()
+
+def get_db() -> DocumentStore:
+    """Returns the shared DocumentStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
+
+def main(argv: Optional[List[str]] = None, prog: str = "python -m src.storage.database"):
+    """Query CLI: python -m src.storage.database {find,search,rebuild} ... (also `main.py query`)"""
+    parser = argparse.ArgumentParser(prog=prog, description="Query processed documents.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(sub):
+        sub.add_argument("--type", dest="doc_type", help="invoice, contract, maintenance_report, unknown")
+        sub.add_argument("--supplier")
+        sub.add_argument("--cnpj")
+        sub.add_argument("--equipment")
+        sub.add_argument("--technician")
+        sub.add_argument("--month", type=parse_month, help="YYYY-MM")
+        sub.add_argument("--from", dest="date_from", help="YYYY-MM-DD (inclusive)")
+        sub.add_argument("--to", dest="date_to", help="YYYY-MM-DD (exclusive)")
+        sub.add_argument("--limit", type=int, default=100)
+
+    add_filters(subparsers.add_parser("find", help="Lookup by indexed fields"))
+    search_parser = subparsers.add_parser("search", help="Full-text search over descriptions")
+    search_parser.add_argument("text")
+    add_filters(search_parser)
+    subparsers.add_parser("rebuild", help="Re-index every JSON file in data/processed")
+
+    args = parser.parse_args(argv)
+    store = get_db()
+
+    if args.command == "rebuild":
+        print(f"Indexed {store.rebuild()} documents into {store.db_path}")
+        return
+
+    date_from, date_to = args.month or (args.date_from, args.date_to)
+    filters = dict(doc_type=args.doc_type, supplier=args.supplier, cnpj=args.cnpj,
+                   equipment=args.equipment, technician=args.technician,
+                   date_from=date_from, date_to=date_to, limit=args.limit)
+
+    if args.command == "find":
+        results = store.find(**filters)
+    else:
+        results = store.search(args.text, **filters)
+
+    for entry in results:
+        print(json.dumps(entry["result"], ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,35 @@
-# Placeholder for database schemas
+# SQLite schema for the processed-results index (see src/storage/database.py)
+
+DOCUMENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS documents (
+    filename        TEXT PRIMARY KEY,
+    doc_type        TEXT,
+    status          TEXT,
+    confidence      REAL,
+    processed_at    TEXT,
+    supplier_name   TEXT COLLATE NOCASE, -- invoice supplier or contract hired party
+    cnpj            TEXT,                -- no punctuation, uppercase
+    doc_date        TEXT,                -- ISO yyyy-mm-dd, NULL if unparseable
+    equipment_name  TEXT COLLATE NOCASE,
+    technician_name TEXT COLLATE NOCASE,
+    payload         TEXT                 -- full result JSON
+)
+"""
+
+# Secondary indexes; each lookup column is paired with the date so
+# "X in March" queries are a single index range scan.
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_documents_cnpj_date ON documents (cnpj, doc_date)",
+    "CREATE INDEX IF NOT EXISTS idx_documents_supplier_date ON documents (supplier_name, doc_date)",
+    "CREATE INDEX IF NOT EXISTS idx_documents_equipment_date ON documents (equipment_name, doc_date)",
+    "CREATE INDEX IF NOT EXISTS idx_documents_technician_date ON documents (technician_name, doc_date)",
+    "CREATE INDEX IF NOT EXISTS idx_documents_type_date ON documents (doc_type, doc_date)",
+    "CREATE INDEX IF NOT EXISTS idx_documents_date ON documents (doc_date)",
+]
+
+# Full-text search over descriptions; rowid matches documents.rowid.
+# remove_diacritics lets "manutencao" match "manutenção".
+FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts
+USING fts5(body, tokenize = 'unicode61 remove_diacritics 2')
+"""
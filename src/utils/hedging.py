@@ -0,0 +1,133 @@
+import time
+import threading
+import contextvars
+import concurrent.futures
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from src.config.settings import (
+    HEDGING_ENABLED,
+    HEDGE_LATENCY_PERCENTILE,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    EXTRA_REQUESTS_PER_MINUTE,
+)
+from src.utils.logger import logger
+
+class LatencyTracker:
+    """Keeps a sliding window of call latencies to derive percentiles."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Returns the q-th percentile (0-1), or None if there are too few samples."""
+        with self.lock:
+            if len(self.samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self.samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+class RequestBudget:
+    """
+    Token bucket capping the number of extra requests (hedges, speculative
+    extractions) per minute, so they can't blow through the API rate limit.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(per_minute, 0)
+        self.tokens = float(self.capacity)
+        self.refill_rate = self.capacity / 60.0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+# Shared between hedging and speculative extraction
+extra_request_budget = RequestBudget(EXTRA_REQUESTS_PER_MINUTE)
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+# Dedicated pool for LLM calls so a hung request doesn't hold the caller's thread hostage
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+
+def get_tracker(kind: str) -> LatencyTracker:
+    with _trackers_lock:
+        if kind not in _trackers:
+            _trackers[kind] = LatencyTracker()
+        return _trackers[kind]
+
+def hedge_delay(kind: str) -> float:
+    """Seconds to wait for the primary request before firing a hedge."""
+    observed = get_tracker(kind).percentile(HEDGE_LATENCY_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES)
+    if observed is None:
+        return HEDGE_DEFAULT_DELAY_SECONDS
+    return max(observed, HEDGE_MIN_DELAY_SECONDS)
+
+def hedged_call(kind: str, fn: Callable[..., Any], *args, enabled: Optional[bool] = None,
+                budget: Optional[RequestBudget] = None, **kwargs) -> Any:
+    """
+    Calls fn(*args, **kwargs). If it runs longer than the latency percentile
+    observed for `kind`, a duplicate request is fired (budget permitting) and
+    the first successful result is returned.
+    Errors are raised only when every in-flight request has failed, so the
+    caller's retry policy still applies.
+    The primary's latency is recorded however it ends (success, failure, or
+    finishing after a hedge won), so the percentile tracks real call latency
+    rather than only the winners.
+    """
+    if not (HEDGING_ENABLED if enabled is None else enabled):
+        return fn(*args, **kwargs)
+
+    budget = budget or extra_request_budget
+    tracker = get_tracker(kind)
+    started = {}
+
+    def submit():
+        # Each request runs in a copy of the caller's context so its logs keep the doc id/stage
+        future = _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        started[future] = time.monotonic()
+        return future
+
+    primary = submit()
+    # Fires when the primary finishes, even after the call returned; a cancelled
+    # (abandoned) primary records how long it had waited so far
+    primary.add_done_callback(lambda future: tracker.record(time.monotonic() - started[future]))
+    delay = hedge_delay(kind)
+    pending = {primary}
+
+    done, _ = concurrent.futures.wait(pending, timeout=delay)
+    if not done:
+        if budget.try_acquire():
+            logger.warning(f"{kind} call exceeded {delay:.1f}s, firing hedged request")
+            pending.add(submit())
+        else:
+            logger.info(f"{kind} call exceeded {delay:.1f}s but hedge budget is exhausted")
+
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+
+    raise error
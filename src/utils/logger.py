@@ -1,39 +1,182 @@
 import logging
+import logging.handlers
 import os
 import sys
+import json
+import zlib
+import queue
+import atexit
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from src.config.settings import (
+    LOG_ASYNC,
+    LOG_FILE_FORMAT,
+    LOG_LEVEL,
+    LOG_CONSOLE_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_SAMPLE_RATES,
+)
 
-# Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.getcwd(), "logs")
-os.makedirs(LOGS_DIR, exist_ok=True)
 
-def setup_logger(name: str = "doc_pipeline"):
+# Document currently being processed by this thread, and its pipeline stage
+_doc_id = contextvars.ContextVar("doc_id", default=None)
+_stage = contextvars.ContextVar("stage", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+@contextmanager
+def log_context(doc_id: Optional[str] = None, stage: Optional[str] = None):
+    """Tags every record logged inside the block with the document id and stage."""
+    doc_token = _doc_id.set(doc_id)
+    stage_token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _stage.reset(stage_token)
+        _doc_id.reset(doc_token)
+
+def set_stage(stage: str):
+    """Updates the stage for the current document context."""
+    _stage.set(stage)
+
+class ContextFilter(logging.Filter):
+    """Copies doc_id/stage onto the record in the emitting thread (explicit `extra` wins)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "doc_id"):
+            record.doc_id = _doc_id.get()
+        if not hasattr(record, "stage"):
+            record.stage = _stage.get()
+        return True
+
+class SamplingFilter(logging.Filter):
     """
-    Sets up a logger with both File and Stream handlers.
-    output: logs/pipeline.log
+    Keeps only a fraction of per-document records for each level.
+    Sampling is by document, so a kept document keeps its full trace.
+    Records without a document id (summaries, startup) are never dropped.
     """
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        doc_id = getattr(record, "doc_id", None)
+        if rate >= 1.0 or not doc_id:
+            return True
+        return zlib.crc32(str(doc_id).encode("utf-8")) / 2**32 < rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, thread, doc_id and stage."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "doc_id": getattr(record, "doc_id", None),
+            "stage": getattr(record, "stage", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Creates the logs directory on first write instead of at import time."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback separate so the JSON formatter can emit it as a field."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_sample_rates(spec: str) -> Dict[int, float]:
+    """'INFO=0.1,DEBUG=0' -> {logging.INFO: 0.1, logging.DEBUG: 0.0}"""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        level, _, rate = part.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+def stop_logging():
+    """Flushes queued records and stops the background listener (registered at exit)."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+def setup_logger(name: str = "doc_pipeline", async_mode: bool = LOG_ASYNC):
+    """
+    Sets up a logger with a rotating File handler and a Stream handler.
+    output: logs/pipeline.log (JSON lines by default)
+    In async mode, workers only enqueue records; a QueueListener thread does the I/O.
+    """
+    global _listener
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
 
     # Prevent adding handlers multiple times
     if logger.hasHandlers():
         return logger
 
     # Format
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    text_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_formatter = JsonFormatter() if LOG_FILE_FORMAT == "json" else text_formatter
 
     # File Handler
-    file_handler = logging.FileHandler(os.path.join(LOGS_DIR, "pipeline.log"), encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.INFO)
+    file_handler = LazyRotatingFileHandler(
+        os.path.join(LOGS_DIR, "pipeline.log"),
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(file_formatter)
+    file_handler.setLevel(LOG_LEVEL)
 
     # Stream Handler (Console)
     stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setFormatter(formatter)
-    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(text_formatter)
+    stream_handler.setLevel(LOG_CONSOLE_LEVEL)
+
+    filters = [ContextFilter(), SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES))]
+
+    if async_mode:
+        queue_handler = StructuredQueueHandler(queue.SimpleQueue())
+        for f in filters:
+            queue_handler.addFilter(f)
+        logger.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(
+            queue_handler.queue, file_handler, stream_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        for handler in (file_handler, stream_handler):
+            for f in filters:
+                handler.addFilter(f)
+            logger.addHandler(handler)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
-    
     return logger
 
 # Singleton logger instance
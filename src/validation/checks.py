@@ -0,0 +1,94 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+# Tolerance of 0.01 for floating point rounding errors
+MATH_TOLERANCE = 0.01
+
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y"]
+
+PT_MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+CNPJ_WEIGHTS = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+
+def parse_date(value: Any) -> Optional[date]:
+    """Parses the date formats found in the documents (e.g. 05/03/2024, 5 de março de 2024)."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+
+    match = re.fullmatch(r"(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})", value, re.IGNORECASE)
+    if match and match.group(2).lower() in PT_MONTHS:
+        try:
+            return date(int(match.group(3)), PT_MONTHS[match.group(2).lower()], int(match.group(1)))
+        except ValueError:
+            return None
+    return None
+
+def normalize_cnpj(value: Any) -> Optional[str]:
+    """Strips punctuation and uppercases, keeping letters (alphanumeric CNPJs, issued since July 2026)."""
+    if not isinstance(value, str):
+        return None
+    return re.sub(r"[^0-9A-Za-z]", "", value).upper() or None
+
+def is_valid_cnpj(value: Any) -> bool:
+    """
+    Validates the two CNPJ check digits. Accepts formatted or bare values, numeric or
+    alphanumeric: the first 12 characters may be letters (each worth ord(c) - 48),
+    the check digits are always numeric.
+    """
+    cnpj = normalize_cnpj(value)
+    if not cnpj or not re.fullmatch(r"[0-9A-Z]{12}[0-9]{2}", cnpj) or len(set(cnpj)) == 1:
+        return False
+
+    values = [ord(c) - 48 for c in cnpj]
+    for position, weights in ((12, CNPJ_WEIGHTS), (13, [6] + CNPJ_WEIGHTS)):
+        remainder = sum(v * w for v, w in zip(values, weights)) % 11
+        expected = 0 if remainder < 2 else 11 - remainder
+        if values[position] != expected:
+            return False
+    return True
+
+def math_divergence(item_totals: List[float], total_amount: float) -> float:
+    """Absolute difference between the sum of item totals and the declared total."""
+    return abs(sum(item_totals) - total_amount)
+
+def check_fields(doc_type: str, data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Runs deterministic, local checks on extracted data.
+    Returns a list of issues ({"field", "reason"}); empty if everything passes.
+    """
+    issues = []
+
+    if doc_type == "invoice":
+        if not is_valid_cnpj(data.get("cnpj")):
+            issues.append({"field": "cnpj", "reason": f"invalid CNPJ check digits ({data.get('cnpj')!r})"})
+
+        if parse_date(data.get("date")) is None:
+            issues.append({"field": "date", "reason": f"unparseable date ({data.get('date')!r})"})
+
+        try:
+            item_totals = [float(item["total_value"]) for item in data.get("items") or []]
+            total_amount = float(data.get("total_amount"))
+        except (KeyError, TypeError, ValueError):
+            pass # Schema validation reports malformed items/total
+        else:
+            if math_divergence(item_totals, total_amount) > MATH_TOLERANCE:
+                reason = f"items sum to {sum(item_totals):.2f} but total_amount is {total_amount:.2f}"
+                issues.append({"field": "items", "reason": reason})
+                issues.append({"field": "total_amount", "reason": reason})
+
+    elif doc_type == "maintenance_report":
+        if parse_date(data.get("date")) is None:
+            issues.append({"field": "date", "reason": f"unparseable date ({data.get('date')!r})"})
+
+    return issues
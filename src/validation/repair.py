@@ -0,0 +1,215 @@
+import re
+import json
+from typing import Any, Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+from langchain_core.messages import HumanMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from src.models.nota_fiscal import Invoice
+from src.models.contrato import ServiceContract
+from src.models.relatorio import MaintenanceReport
+from src.validation.checks import check_fields
+from src.config.settings import GOOGLE_API_KEY, REPAIR_ENABLED, REPAIR_MAX_ATTEMPTS, REPAIR_CONTEXT_CHARS
+from src.config.prompts import REPAIR_SYSTEM_PROMPT
+from src.utils.logger import logger
+from src.utils.hedging import hedged_call
+
+MODELS: Dict[str, Type[BaseModel]] = {
+    "invoice": Invoice,
+    "contract": ServiceContract,
+    "maintenance_report": MaintenanceReport,
+}
+
+# Lines worth sending back to the model when re-asking for a field
+FIELD_HINTS = {
+    "cnpj": r"cnpj|\w{2}\.?\w{3}\.?\w{3}/?\w{4}-?\d{2}",
+    "date": r"data|emiss|\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}",
+    "supplier_name": r"raz[aã]o|emitente|fornecedor|ltda|s\.?a\.?\b|me\b",
+    "items": r"\d+[.,]\d{2}",
+    "total_amount": r"total",
+    "technician_name": r"t[eé]cnico|respons[aá]vel",
+    "equipment_name": r"equipamento|m[aá]quina|modelo|s[eé]rie",
+    "monthly_value": r"mensal|valor|r\$",
+    "validity_date": r"vig[eê]ncia|validade|prazo",
+}
+
+# Scanned documents have no text to slice: send only the page where a field
+# usually sits. Fields not listed here (items, descriptions) may span pages,
+# so they get no cheap repair on scans.
+IMAGE_FIELD_PAGES = {
+    "cnpj": "first",
+    "supplier_name": "first",
+    "date": "first",
+    "contractor_name": "first",
+    "hired_name": "first",
+    "validity_date": "first",
+    "monthly_value": "first",
+    "technician_name": "first",
+    "equipment_name": "first",
+    "total_amount": "last",
+}
+
+def salvage_partial_output(raw: Any) -> Dict[str, Any]:
+    """
+    Recovers the fields the model did return when structured output fails validation,
+    so only the invalid ones have to be re-asked.
+    """
+    tool_calls = getattr(raw, "tool_calls", None)
+    if tool_calls:
+        return dict(tool_calls[0].get("args") or {})
+
+    content = getattr(raw, "content", "")
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    content = re.sub(r"^```(?:json)?|```$", "", content.strip()).strip()
+    try:
+        parsed = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+def schema_issues(model: Type[BaseModel], data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Lists top-level fields that don't satisfy the Pydantic schema."""
+    try:
+        model.model_validate(data)
+        return []
+    except ValidationError as e:
+        issues = {}
+        for error in e.errors():
+            if error["loc"]:
+                field = str(error["loc"][0])
+                issues.setdefault(field, {"field": field, "reason": error["msg"]})
+        return list(issues.values())
+
+def find_issues(doc_type: str, data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Schema errors first; domain checks only for fields that are well-formed."""
+    issues = schema_issues(MODELS[doc_type], data)
+    broken = {issue["field"] for issue in issues}
+    issues += [issue for issue in check_fields(doc_type, data) if issue["field"] not in broken]
+    return issues
+
+def repairable_fields(content_data: Dict[str, Any], fields: List[str]) -> List[str]:
+    """Fields that can be re-asked with a small slice of this document."""
+    if content_data.get("text"):
+        return list(fields)
+    return [f for f in fields if f in IMAGE_FIELD_PAGES]
+
+def build_context_slice(content_data: Dict[str, Any], fields: List[str], max_chars: int = REPAIR_CONTEXT_CHARS) -> Dict[str, Any]:
+    """
+    Picks the lines of the document relevant to the failing fields (plus a line of
+    context around each). If any field has no hint to locate it, sends the whole
+    text (truncated) instead. For scanned documents, picks only the first and/or
+    last page image, depending on where the fields usually are.
+    """
+    text = content_data.get("text", "")
+    if not text:
+        images = content_data.get("images", [])
+        pages = {0 if IMAGE_FIELD_PAGES[f] == "first" else len(images) - 1
+                 for f in fields if f in IMAGE_FIELD_PAGES} if images else set()
+        return {"text": "", "images": [images[i] for i in sorted(pages)]}
+
+    if any(f not in FIELD_HINTS for f in fields):
+        return {"text": text[:max_chars], "images": []}
+
+    lines = text.splitlines()
+    patterns = [re.compile(FIELD_HINTS[f], re.IGNORECASE) for f in fields]
+
+    selected = set()
+    for i, line in enumerate(lines):
+        if any(p.search(line) for p in patterns):
+            selected.update(range(max(i - 1, 0), min(i + 2, len(lines))))
+
+    excerpt = "\n".join(lines[i] for i in sorted(selected)) if selected else text
+    return {"text": excerpt[:max_chars], "images": []}
+
+def repair_fields(doc_type: str, issues: List[Dict[str, str]], content_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-asks the model only for the failing fields, with a minimal slice of the document."""
+    if not GOOGLE_API_KEY:
+        raise ValueError("GOOGLE_API_KEY is not set.")
+
+    model = MODELS[doc_type]
+    fields = sorted({issue["field"] for issue in issues if issue["field"] in model.model_fields})
+    if not fields:
+        return {}
+
+    repair_model = create_model(
+        f"{model.__name__}Repair",
+        **{f: (model.model_fields[f].annotation, model.model_fields[f]) for f in fields}
+    )
+
+    llm = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0,
+        google_api_key=GOOGLE_API_KEY
+    )
+    structured_llm = llm.with_structured_output(repair_model)
+
+    issue_lines = "\n".join(f"- {issue['field']}: {issue['reason']}" for issue in issues if issue["field"] in fields)
+    context = build_context_slice(content_data, fields)
+
+    user_content = [{"type": "text", "text": REPAIR_SYSTEM_PROMPT.format(issues=issue_lines)}]
+    if context["text"]:
+        user_content.append({"type": "text", "text": f"\nDocument Excerpt:\n{context['text']}"})
+    for img in context["images"]:
+        user_content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:{img['mime_type']};base64,{img['data']}"}
+        })
+
+    @retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def invoke_with_retry(msgs):
+        return hedged_call("repair", structured_llm.invoke, msgs)
+
+    result = invoke_with_retry([HumanMessage(content=user_content)])
+    return result.model_dump(exclude_none=True)
+
+def validate_and_repair(doc_type: str, data: Dict[str, Any], content_data: Dict[str, Any],
+                        max_attempts: int = REPAIR_MAX_ATTEMPTS) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Runs local checks on the extracted data and re-asks for failing fields,
+    bounded by `max_attempts` repair calls.
+    Returns the (possibly corrected) data and a report for the output metadata.
+    """
+    if doc_type not in MODELS:
+        return data, {"status": "skipped"}
+
+    data = dict(data)
+    issues = find_issues(doc_type, data)
+    repaired_fields = set()
+    attempts = 0
+
+    if not REPAIR_ENABLED:
+        max_attempts = 0
+
+    while issues and attempts < max_attempts:
+        fields = repairable_fields(content_data, sorted({i["field"] for i in issues}))
+        if not fields:
+            logger.info(f"No small slice available for fields {sorted({i['field'] for i in issues})}, skipping repair")
+            break
+
+        attempts += 1
+        logger.info(f"Repair attempt {attempts}/{max_attempts} for fields: {fields}")
+        try:
+            fixes = repair_fields(doc_type, [i for i in issues if i["field"] in fields], content_data)
+        except Exception as e:
+            logger.warning(f"Field repair failed: {e}")
+            break
+        data.update(fixes)
+        repaired_fields.update(fixes)
+        issues = find_issues(doc_type, data)
+
+    if issues:
+        status = "failed"
+        logger.warning(f"Validation issues remain after {attempts} repair attempt(s): {issues}")
+    else:
+        status = "repaired" if attempts else "valid"
+
+    return data, {
+        "status": status,
+        "repair_attempts": attempts,
+        # A field the model returned but that still fails wasn't repaired
+        "repaired_fields": sorted(repaired_fields - {i["field"] for i in issues}),
+        "issues": issues,
+    }
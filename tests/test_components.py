@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from src.ingestion.pdf_processor import load_documents
 from src.classification.classifier import classify_document, ClassificationResult
 # from src.extractor import extract_data # Removed as it does not exist
@@ -32,5 +32,376 @@ class TestComponents(unittest.TestCase):
         # For now, we trust the import works
         self.assertTrue(callable(load_documents))
 
+    def test_hedged_call_returns_first_result(self):
+        """A slow primary call is hedged and the faster duplicate wins."""
+        import time
+        from src.utils.hedging import hedged_call, get_tracker, RequestBudget
+
+        calls = []
+        def flaky_latency():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(1.0) # Primary hangs
+            return len(calls)
+
+        start = time.monotonic()
+        with patch("src.utils.hedging.hedge_delay", return_value=0.1):
+            result = hedged_call("test_hedge", flaky_latency, enabled=True, budget=RequestBudget(10))
+        self.assertEqual(result, 2)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        # The losing primary's latency is still recorded once it finishes
+        tracker = get_tracker("test_hedge")
+        while not tracker.samples and time.monotonic() - start < 3.0:
+            time.sleep(0.05)
+        self.assertGreaterEqual(tracker.percentile(1.0), 1.0)
+
+    def test_hedge_budget_caps_extra_requests(self):
+        from src.utils.hedging import RequestBudget
+
+        budget = RequestBudget(2)
+        self.assertTrue(budget.try_acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+
+    def test_predict_document_type(self):
+        from src.classification.heuristics import predict_document_type
+
+        self.assertEqual(predict_document_type("contrato_acme.pdf", {"text": ""}), "contract")
+        text = "NOTA FISCAL\nCNPJ: 00.000.000/0001-00\nValor Total: 10,00"
+        self.assertEqual(predict_document_type("008_c010.pdf", {"text": text}), "invoice")
+        self.assertIsNone(predict_document_type("008_c010.pdf", {"text": "", "images": []}))
+        self.assertIsNone(predict_document_type("contrato_acme.pdf", {"text": ""}, use_filename=False))
+
+    def _run_speculative_document(self, text, classified_as="invoice", confidence=0.95, extract=None):
+        """Processes one document with speculation on; the LLM, validation and persistence are mocked."""
+        import tempfile
+        from types import SimpleNamespace
+        from src.pipeline.orchestrator import DocumentPipeline
+
+        pipeline = DocumentPipeline(speculative=True)
+        pipeline.processed_hashes = set()
+        pipeline.save_result = MagicMock()
+        pipeline._save_hash = MagicMock()
+        extract = extract or MagicMock(return_value={"supplier_name": "Acme"})
+        pipeline.extractors["invoice"].extract = extract
+
+        classification = SimpleNamespace(document_type=classified_as, confidence=confidence)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as f, \
+             patch("src.pipeline.orchestrator.classify_document", return_value=classification), \
+             patch("src.pipeline.orchestrator.validate_and_repair", side_effect=lambda t, d, c: (d, {"status": "valid"})):
+            doc = {"content": {"text": text, "images": []}, "metadata": {"filename": "008_c010.pdf", "source": f.name}}
+            with pipeline._speculation_pool():
+                result = pipeline.process_document(doc)
+        return pipeline, extract, result
+
+    def test_speculative_extraction(self):
+        """A keyword-backed prediction is used on a hit; the pool is shut down after the run."""
+        text = "NOTA FISCAL\nCNPJ: 11.222.333/0001-81\nValor Total: 10,00"
+        pipeline, extract, result = self._run_speculative_document(text)
+        self.assertEqual(result, "invoice")
+        self.assertEqual(extract.call_count, 1) # Not extracted twice
+        self.assertEqual(pipeline.speculation_stats, {"started": 1, "hits": 1, "discarded": 0})
+        self.assertIsNone(pipeline.speculative_executor)
+
+        # Low confidence goes to quarantine: the speculative result is discarded
+        with patch("src.pipeline.orchestrator.shutil.move"):
+            pipeline, _, result = self._run_speculative_document(text, confidence=0.5)
+        self.assertEqual(result, "quarantined")
+        self.assertEqual(pipeline.speculation_stats["discarded"], 1)
+
+        # No keyword signal: no speculation
+        pipeline, _, _ = self._run_speculative_document("Documento 008")
+        self.assertEqual(pipeline.speculation_stats["started"], 0)
+
+    def test_speculative_extraction_log_stage(self):
+        """Records logged by a speculative extraction are tagged with the extraction stage."""
+        import logging
+        from src.utils.logger import logger, ContextFilter
+
+        records = []
+        handler = logging.Handler()
+        handler.addFilter(ContextFilter())
+        handler.emit = records.append
+
+        def extract(content_data):
+            logger.info("speculative extract")
+            return {"supplier_name": "Acme"}
+
+        logger.addHandler(handler)
+        try:
+            self._run_speculative_document("NOTA FISCAL\nCNPJ: 1\nValor Total: 10,00", extract=MagicMock(side_effect=extract))
+        finally:
+            logger.removeHandler(handler)
+
+        record = next(r for r in records if r.getMessage() == "speculative extract")
+        self.assertEqual((record.doc_id, record.stage), ("008_c010.pdf", "extraction"))
+
+    def test_deterministic_checks(self):
+        from src.validation.checks import is_valid_cnpj, parse_date, check_fields
+
+        self.assertTrue(is_valid_cnpj("11.222.333/0001-81"))
+        self.assertFalse(is_valid_cnpj("11.222.333/0001-82"))
+        self.assertFalse(is_valid_cnpj("00000000000000"))
+        # Alphanumeric CNPJ (letters in the first 12 positions, numeric check digits)
+        self.assertTrue(is_valid_cnpj("12.ABC.345/01DE-35"))
+        self.assertTrue(is_valid_cnpj("12abc34501de35"))
+        self.assertFalse(is_valid_cnpj("12.ABC.345/01DE-36"))
+        self.assertFalse(is_valid_cnpj("12.ABC.345/01DE-3X"))
+        self.assertEqual(str(parse_date("05/03/2024")), "2024-03-05")
+        self.assertEqual(str(parse_date("5 de março de 2024")), "2024-03-05")
+        self.assertIsNone(parse_date("sometime in March"))
+
+        invoice = {
+            "cnpj": "11.222.333/0001-81",
+            "date": "2024-03-05",
+            "items": [{"total_value": 10.0}, {"total_value": 5.0}],
+            "total_amount": 20.0,
+        }
+        fields = {issue["field"] for issue in check_fields("invoice", invoice)}
+        self.assertEqual(fields, {"items", "total_amount"})
+
+    def test_repair_reasks_only_failing_fields(self):
+        """Only the invalid field is re-asked and the outcome is reported."""
+        from src.validation import repair
+
+        data = {
+            "supplier_name": "Test Corp",
+            "cnpj": "11.222.333/0001-82",
+            "date": "2024-03-05",
+            "items": [{"description": "A", "quantity": 1, "unit_value": 10.0, "total_value": 10.0}],
+            "total_amount": 10.0,
+        }
+        content = {"text": "NOTA FISCAL\nCNPJ: 11.222.333/0001-81\nItem A 10,00", "images": []}
+
+        with patch.object(repair, "repair_fields", return_value={"cnpj": "11.222.333/0001-81"}) as mock_repair:
+            fixed, report = repair.validate_and_repair("invoice", data, content)
+
+        issues = mock_repair.call_args[0][1]
+        self.assertEqual([issue["field"] for issue in issues], ["cnpj"])
+        self.assertEqual(fixed["cnpj"], "11.222.333/0001-81")
+        self.assertEqual(report["status"], "repaired")
+        self.assertEqual(report["repaired_fields"], ["cnpj"])
+
+        # A returned value that still fails the checks isn't reported as repaired
+        with patch.object(repair, "repair_fields", return_value={"cnpj": "11.222.333/0001-83"}):
+            _, report = repair.validate_and_repair("invoice", data, content)
+        self.assertEqual(report["status"], "failed")
+        self.assertEqual(report["repaired_fields"], [])
+
+    def test_context_slice_keeps_relevant_lines(self):
+        from src.validation.repair import build_context_slice
+
+        text = "\n".join(["Header"] * 50 + ["CNPJ: 11.222.333/0001-81"] + ["Footer"] * 50)
+        context = build_context_slice({"text": text, "images": [{"data": "x"}]}, ["cnpj"])
+        self.assertIn("CNPJ", context["text"])
+        self.assertLess(len(context["text"]), 50)
+        self.assertEqual(context["images"], [])
+
+        # A field without a hint can't be located, so the whole text is sent
+        text = "Contratante: ACME\nfoo\nbar\nbaz\nVigencia: 12 meses"
+        context = build_context_slice({"text": text}, ["contractor_name", "validity_date"])
+        self.assertEqual(context["text"], text)
+
+    def test_scanned_document_repair_sends_one_page(self):
+        """Scans send only the page where the field sits; unlocatable fields skip repair."""
+        from src.validation import repair
+
+        pages = [{"mime_type": "image/jpeg", "data": f"page{i}"} for i in range(10)]
+        scan = {"text": "", "images": pages}
+        self.assertEqual(repair.build_context_slice(scan, ["cnpj"])["images"], [pages[0]])
+        self.assertEqual(repair.build_context_slice(scan, ["total_amount"])["images"], [pages[-1]])
+
+        report_data = {"date": "2024-03-05", "technician_name": "João", "equipment_name": "X",
+                       "problem_description": "A", "solution_description": None}
+        with patch.object(repair, "repair_fields") as mock_repair:
+            _, report = repair.validate_and_repair("maintenance_report", report_data, scan)
+        mock_repair.assert_not_called()
+        self.assertEqual(report["status"], "failed")
+        self.assertEqual(report["repair_attempts"], 0)
+
+    def test_document_store_queries(self):
+        """Indexed lookups by CNPJ/month and full-text search over descriptions."""
+        from src.storage.database import DocumentStore, month_range
+
+        store = DocumentStore(":memory:")
+        def result(filename, doc_type, data):
+            return {"metadata": {"filename": filename, "classification": {"type": doc_type, "confidence": 0.9}}, "data": data}
+
+        store.index_result("nf1.pdf", result("nf1.pdf", "invoice", {
+            "supplier_name": "Acme", "cnpj": "11.222.333/0001-81", "date": "05/03/2024",
+            "items": [{"description": "Troca de filtro"}], "total_amount": 10.0}))
+        store.index_result("nf2.pdf", result("nf2.pdf", "invoice", {
+            "supplier_name": "Acme", "cnpj": "11222333000181", "date": "2024-04-02", "items": [], "total_amount": 5.0}))
+        store.index_result("rel1.pdf", result("rel1.pdf", "maintenance_report", {
+            "date": "2024-03-10", "technician_name": "João", "equipment_name": "Compressor X",
+            "problem_description": "Vazamento", "solution_description": "Manutenção da válvula"}))
+
+        date_from, date_to = month_range("2024-03")
+        march = store.find(cnpj="11222333000181", date_from=date_from, date_to=date_to)
+        self.assertEqual([r["filename"] for r in march], ["nf1.pdf"])
+        self.assertEqual(len(store.find(equipment="compressor x")), 1)
+        self.assertEqual([r["filename"] for r in store.search("manutencao valvula")], ["rel1.pdf"])
+        self.assertEqual(store.search("filtro")[0]["result"]["data"]["supplier_name"], "Acme")
+        self.assertEqual(store.search("   "), [])
+
+        # Alphanumeric CNPJs keep their letters, so distinct ones don't collapse into one key
+        store.index_result("nf3.pdf", result("nf3.pdf", "invoice", {"cnpj": "12.ABC.345/01DE-35", "date": "2024-03-01", "items": []}))
+        store.index_result("nf4.pdf", result("nf4.pdf", "invoice", {"cnpj": "12.XYZ.345/01DE-35", "date": "2024-03-01", "items": []}))
+        self.assertEqual([r["filename"] for r in store.find(cnpj="12abc34501de35")], ["nf3.pdf"])
+        store.conn.execute("DELETE FROM documents WHERE filename IN ('nf3.pdf', 'nf4.pdf')")
+
+        # Re-indexing replaces the entry instead of duplicating it
+        store.index_result("nf1.pdf", result("nf1.pdf", "invoice", {"supplier_name": "Acme", "cnpj": "", "date": "", "items": []}))
+        self.assertEqual(store.count(), 3)
+        self.assertEqual(store.search("filtro"), [])
+
+    def test_structured_log_records(self):
+        """Records carry doc id/stage as JSON; sampling drops only per-document records."""
+        import json
+        import logging
+        from src.utils.logger import log_context, set_stage, ContextFilter, SamplingFilter, JsonFormatter, parse_sample_rates
+
+        def make_record(level=logging.INFO):
+            record = logging.LogRecord("doc_pipeline", level, __file__, 1, "hello %s", ("world",), None)
+            ContextFilter().filter(record)
+            return record
+
+        with log_context(doc_id="nf1.pdf", stage="classification"):
+            set_stage("extraction")
+            doc_record = make_record()
+        global_record = make_record()
+
+        entry = json.loads(JsonFormatter().format(doc_record))
+        self.assertEqual((entry["doc_id"], entry["stage"], entry["message"]), ("nf1.pdf", "extraction", "hello world"))
+        self.assertIsNone(global_record.doc_id)
+
+        sampler = SamplingFilter(parse_sample_rates("INFO=0"))
+        self.assertFalse(sampler.filter(doc_record))
+        self.assertTrue(sampler.filter(global_record))
+        self.assertTrue(sampler.filter(make_record(logging.ERROR)))
+
+    def test_cli_query_help(self):
+        """`main.py query --help` shows the query usage; bad arguments are usage errors."""
+        import io
+        from contextlib import redirect_stdout, redirect_stderr
+        from src.cli import main
+
+        output = io.StringIO()
+        with redirect_stdout(output), self.assertRaises(SystemExit) as exit_info:
+            main(["query", "--help"])
+        self.assertEqual(exit_info.exception.code, 0)
+        self.assertIn("usage: main.py query", output.getvalue())
+        self.assertIn("find", output.getvalue())
+
+        with self.assertRaises(SystemExit) as exit_info:
+            main(["stats", "--bogus"])
+        self.assertEqual(exit_info.exception.code, 2)
+
+        for month in ("2024", "2024-13"):
+            errors = io.StringIO()
+            with redirect_stderr(errors), self.assertRaises(SystemExit) as exit_info:
+                main(["query", "find", "--month", month])
+            self.assertEqual(exit_info.exception.code, 2)
+            self.assertIn("expected YYYY-MM", errors.getvalue())
+
+    def test_cli_consolidate_reports_result(self):
+        """`main.py consolidate` prints its outcome regardless of the console log level."""
+        import io
+        import os
+        import tempfile
+        from contextlib import redirect_stdout
+        from src.cli import main
+
+        with tempfile.TemporaryDirectory() as workdir:
+            output_path = os.path.join(workdir, "out.csv")
+            records = [{"filename": "a.pdf", "doc_type": "invoice"}, {"filename": "b.pdf", "doc_type": "contract"}]
+            for loaded, expected in ((records, f"Consolidated 2 records to {output_path}"),
+                                     ([], "No processed data found to consolidate.")):
+                output = io.StringIO()
+                with patch("src.pipeline.consolidator.load_processed_data", return_value=loaded), redirect_stdout(output):
+                    main(["consolidate", "--output", output_path])
+                self.assertIn(expected, output.getvalue())
+
+    def test_cli_stats_does_not_import_heavy_dependencies(self):
+        """Startup regression guard: light commands must not pull LangChain, pandas or pypdf."""
+        import os
+        import sys
+        import subprocess
+        import tempfile
+
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            "import sys, src.cli; src.cli.main(['stats']); "
+            "heavy = [m for m in ('langchain_core', 'langchain_google_genai', 'pandas', 'pypdf') if m in sys.modules]; "
+            "assert not heavy, heavy"
+        )
+        with tempfile.TemporaryDirectory() as workdir:
+            env = dict(os.environ, PYTHONPATH=repo_root)
+            result = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env, capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            # Logging no longer creates directories at import time
+            self.assertFalse(os.path.exists(os.path.join(workdir, "logs")))
+
+    def test_scheduler_policies(self):
+        """Shortest job first, per-type priorities, fair share and aging."""
+        from src.pipeline.scheduler import DocumentScheduler
+
+        def doc(name, pages, text=""):
+            return {"content": {"text": text, "images": [], "page_count": pages, "image_bytes": 0},
+                    "metadata": {"filename": name, "source": name}}
+
+        def order(scheduler, docs):
+            for d in docs:
+                scheduler.add(d)
+            return [scheduler.next()["metadata"]["filename"] for _ in range(len(docs))]
+
+        docs = [doc("scan_big.pdf", 40), doc("nf_small.pdf", 1), doc("contrato_mid.pdf", 5)]
+        self.assertEqual(order(DocumentScheduler("fifo"), docs), ["scan_big.pdf", "nf_small.pdf", "contrato_mid.pdf"])
+        self.assertEqual(order(DocumentScheduler("sjf"), docs), ["nf_small.pdf", "contrato_mid.pdf", "scan_big.pdf"])
+
+        # A high contract priority beats the cheaper invoice
+        priority = DocumentScheduler("priority", type_priorities={"contract": 10.0})
+        self.assertEqual(order(priority, docs)[0], "contrato_mid.pdf")
+
+        # Fair share alternates types even when one has many cheap documents
+        fair_docs = [doc(f"nf_{i}.pdf", 1) for i in range(3)] + [doc("contrato_a.pdf", 2)]
+        self.assertEqual(order(DocumentScheduler("fair"), fair_docs)[:2], ["nf_0.pdf", "contrato_a.pdf"])
+
+        # Aging (incremental adds only): a big document that waited long enough overtakes a newly queued small one
+        now = [0.0]
+        aging = DocumentScheduler("sjf", aging_rate=1.0, clock=lambda: now[0])
+        aging.add(doc("scan_big.pdf", 40))
+        now[0] = 100.0
+        aging.add(doc("nf_small.pdf", 1))
+        self.assertEqual(aging.next()["metadata"]["filename"], "scan_big.pdf")
+
+    def test_run_dispatches_in_scheduler_order(self):
+        """run() hands documents to the workers cheapest first, not in glob order."""
+        from src.pipeline.orchestrator import DocumentPipeline
+        from src.pipeline.scheduler import DocumentScheduler
+
+        sizes = {"scan_40.pdf": 40, "a_1.pdf": 1, "b_12.pdf": 12, "c_3.pdf": 3, "d_30.pdf": 30, "e_2.pdf": 2, "f_7.pdf": 7}
+        documents = [{"content": {"text": "", "images": [], "page_count": pages, "image_bytes": 0},
+                      "metadata": {"filename": name, "source": name}} for name, pages in sizes.items()]
+
+        dispatched = []
+        scheduler = DocumentScheduler("sjf")
+        original_next = scheduler.next
+        def recording_next():
+            doc = original_next()
+            dispatched.append(doc["metadata"]["filename"])
+            return doc
+        scheduler.next = recording_next
+
+        pipeline = DocumentPipeline(speculative=False)
+        pipeline.process_document = MagicMock(return_value="invoice")
+        with patch("src.pipeline.orchestrator.load_documents", return_value=documents), \
+             patch("src.pipeline.orchestrator.consolidate_to_csv"):
+            pipeline.run("unused", scheduler=scheduler)
+
+        self.assertEqual(dispatched, sorted(sizes, key=sizes.get))
+        self.assertEqual(pipeline.process_document.call_count, len(sizes))
+
 if __name__ == '__main__':
     unittest.main()